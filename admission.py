@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import (
+    MAX_CONCURRENT_GENERATIONS,
+    MAX_CONCURRENT_EXTRACTIONS,
+    MAX_CONCURRENT_ANSWERS,
+    USER_GENERATIONS_PER_WINDOW,
+    QUOTA_WINDOW_SECONDS,
+)
+
+BUSY_MESSAGE = "⏳ The bot is busy right now. Please try again shortly."
+QUOTA_MESSAGE = "⏳ You've reached the quiz limit for now. Please try again later."
+
+class Budget:
+    """Concurrency budget with an optional per-user cap. A limit of 0 means unlimited."""
+
+    def __init__(self, name, limit, per_user=0):
+        self.name = name
+        self.limit = limit
+        self.per_user = per_user
+        self.active = 0
+        self._by_user = {}
+        self._cond = threading.Condition()
+
+    def try_acquire(self, user_id, wait=False):
+        with self._cond:
+            if self.per_user and self._by_user.get(user_id, 0) >= self.per_user:
+                return False
+            while self.limit and self.active >= self.limit:
+                if not wait:
+                    return False
+                self._cond.wait()
+            self.active += 1
+            self._by_user[user_id] = self._by_user.get(user_id, 0) + 1
+            return True
+
+    def has_room(self, user_id):
+        """Whether try_acquire would currently succeed, without taking a slot."""
+        with self._cond:
+            if self.per_user and self._by_user.get(user_id, 0) >= self.per_user:
+                return False
+            return not self.limit or self.active < self.limit
+
+    def release(self, user_id):
+        with self._cond:
+            self.active -= 1
+            count = self._by_user.get(user_id, 0) - 1
+            if count > 0:
+                self._by_user[user_id] = count
+            else:
+                self._by_user.pop(user_id, None)
+            self._cond.notify()
+
+class RateQuota:
+    """Sliding-window quota of events per user."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._events = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def _recent(self, user_id, now):
+        """Drop expired events for user_id, forgetting the user once none are left. Call with the lock held."""
+        events = self._events.get(user_id)
+        if events is None:
+            return None
+        while events and now - events[0] > self.window:
+            events.popleft()
+        if not events:
+            del self._events[user_id]
+            return None
+        return events
+
+    def _sweep(self, now):
+        # Users who never come back would otherwise keep their entry forever
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        for user_id in list(self._events):
+            self._recent(user_id, now)
+
+    def would_allow(self, user_id):
+        if not self.limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            events = self._recent(user_id, now)
+            return events is None or len(events) < self.limit
+
+    def allow(self, user_id):
+        if not self.limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            events = self._recent(user_id, now)
+            if events is None:
+                events = self._events[user_id] = deque()
+            if len(events) >= self.limit:
+                return False
+            events.append(now)
+            return True
+
+generation_budget = Budget("generation", MAX_CONCURRENT_GENERATIONS, per_user=1)
+extraction_budget = Budget("extraction", MAX_CONCURRENT_EXTRACTIONS, per_user=1)
+# Answers never compete with generation; they queue instead of being shed
+answer_budget = Budget("answer", MAX_CONCURRENT_ANSWERS)
+generation_quota = RateQuota(USER_GENERATIONS_PER_WINDOW, QUOTA_WINDOW_SECONDS)
+
+def generation_shed_message(user_id):
+    """Reply to send instead of starting work that would end in a generation
+    that cannot run, or None. Checked before expensive extraction."""
+    if not generation_quota.would_allow(user_id):
+        return QUOTA_MESSAGE
+    if not generation_budget.has_room(user_id):
+        return BUSY_MESSAGE
+    return None
+
+@contextmanager
+def admit(budget, user_id, wait=False):
+    admitted = budget.try_acquire(user_id, wait)
+    try:
+        yield admitted
+    finally:
+        if admitted:
+            budget.release(user_id)
@@ -4,8 +4,7 @@ import requests
 from flask import Flask, request
 from io import BytesIO
 
-import pdfplumber
-import docx
+from file_utils import preprocess_for_quiz
 
 # --- CONFIG ---
 VERIFY_TOKEN = os.getenv("FB_VERIFY_TOKEN", "verify_token")
@@ -32,18 +31,6 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def preprocess_for_quiz(text):
-    """Remove headers, course codes, checkmarks, and non-lesson content."""
-    lines = text.splitlines()
-    content_lines = []
-    for line in lines:
-        line = line.strip()
-        # Skip empty lines, course codes, numbers at the start, or checklist symbols
-        if not line or re.match(r'^(NCMB|BACHELOR|COURSE|✓|[0-9]+)', line):
-            continue
-        content_lines.append(line)
-    return " ".join(content_lines)
-
 # --- FB Send Functions ---
 def send_message(recipient_id, text):
     url = f"https://graph.facebook.com/v17.0/me/messages?access_token={PAGE_ACCESS_TOKEN}"
@@ -81,6 +68,7 @@ def send_menu(recipient_id):
 def extract_pdf_text_only(file_path):
     """Extract visible text only from a text-based PDF (local or URL)."""
     try:
+        import pdfplumber  # heavy (pdfminer, Pillow), so imported on first use
         text = ""
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
@@ -107,6 +95,7 @@ def extract_text_from_url(file_url):
         elif file_url.lower().endswith((".docx", ".doc")):
             resp = requests.get(file_url, timeout=20)
             resp.raise_for_status()
+            import docx
             doc = docx.Document(BytesIO(resp.content))
             return "\n".join(p.text for p in doc.paragraphs)
         else:
@@ -1,24 +1,42 @@
 import os
+import threading
 from flask import Flask, request
-from facebook_api import send_message, send_quick_replies, send_menu
-from file_utils import extract_text_from_url, clean_text
+from tracing import start_trace
+import profiler
+from metrics import render_metrics, WEBHOOK_EVENTS, WEBHOOK_SECONDS, QUIZ_SEND_CALLS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from facebook_api import send_message, send_menu, MENU_TEXT, MENU_OPTIONS
+from message_composer import send_composed
+from file_utils import extract_text_from_url, warm_up
 from quiz import generate_quiz_from_text, format_question_message
 from session_manager import get_session, set_session
-from get_started import setup_get_started_button, handle_postback
-from config import VERIFY_TOKEN
+from get_started import setup_get_started_button_in_background, handle_postback
+from config import VERIFY_TOKEN, PROFILE_TOKEN, PROFILE_SECONDS, WARM_UP_PARSERS
+from admission import (
+    admit, generation_budget, extraction_budget, answer_budget, generation_quota,
+    generation_shed_message, BUSY_MESSAGE, QUOTA_MESSAGE,
+)
 
 app = Flask(__name__)
 
+QUIZ_REPLIES = ["A", "B", "C", "D", "Quit"]
+
 def start_quiz(user_id, questions):
     if not questions:
-        send_message(user_id, "No quiz could be generated. Please try again.")
-        send_menu(user_id)
+        send_composed(user_id, ["No quiz could be generated. Please try again.", MENU_TEXT], MENU_OPTIONS)
         return
-    set_session(user_id, {"state": "in_quiz", "questions": questions, "index": 0, "score": 0})
+    set_session(user_id, {"state": "in_quiz", "questions": questions, "index": 0, "score": 0, "sends": 0})
     ask_question(user_id)
 
-# Updated ask_question to add a "Quit" quick reply
-def ask_question(user_id):
+def finish_quiz(user_id, sess, sends):
+    # Per-quiz Send API call count, including the final message
+    total = sess.get("sends", 0) + sends
+    QUIZ_SEND_CALLS.observe(total)
+    print(f"Quiz ended for {user_id}: {total} Send API calls")
+    set_session(user_id, {"state": "awaiting_menu"})
+
+# Updated ask_question to add a "Quit" quick reply; feedback for the previous
+# answer is sent in the same message as the next prompt
+def ask_question(user_id, feedback=None):
     sess = get_session(user_id)
     if not sess:
         send_menu(user_id)
@@ -26,15 +44,19 @@ def ask_question(user_id):
     idx = sess.get("index", 0)
     questions = sess.get("questions", [])
     if idx >= len(questions):
-        send_message(user_id, f"✅ Quiz finished! Score: {sess.get('score',0)}/{len(questions)}")
-        send_menu(user_id)
-        set_session(user_id, {"state": "awaiting_menu"})
+        sends = send_composed(
+            user_id,
+            [feedback, f"✅ Quiz finished! Score: {sess.get('score',0)}/{len(questions)}", MENU_TEXT],
+            MENU_OPTIONS,
+        )
+        finish_quiz(user_id, sess, sends)
         return
 
     q = questions[idx]
     question_text = format_question_message(q)
     # Add Quit as quick reply option
-    send_quick_replies(user_id, question_text, ["A", "B", "C", "D", "Quit"])
+    sess["sends"] = sess.get("sends", 0) + send_composed(user_id, [feedback, question_text], QUIZ_REPLIES)
+    set_session(user_id, sess)
 
 # Updated handle_answer to process Quit command
 def handle_answer(user_id, text):
@@ -44,9 +66,8 @@ def handle_answer(user_id, text):
         return
 
     if text.strip().lower() == "quit":
-        send_message(user_id, "🛑 Quiz exited. Returning to main menu.")
-        set_session(user_id, {"state": "awaiting_menu"})
-        send_menu(user_id)
+        sends = send_composed(user_id, ["🛑 Quiz exited. Returning to main menu.", MENU_TEXT], MENU_OPTIONS)
+        finish_quiz(user_id, sess, sends)
         return
 
     idx = sess.get("index", 0)
@@ -59,14 +80,50 @@ def handle_answer(user_id, text):
     user_answer = text.strip().upper()
     correct_answer = q.get("answer", "").upper()
     if user_answer.startswith(correct_answer):
-        send_message(user_id, "✅ Correct!")
+        feedback = "✅ Correct!"
         sess["score"] = sess.get("score", 0) + 1
     else:
         correct_text = q["options"].get(correct_answer, "N/A")
-        send_message(user_id, f"❌ Incorrect. Correct: {correct_answer}) {correct_text}")
+        feedback = f"❌ Incorrect. Correct: {correct_answer}) {correct_text}"
     sess["index"] = idx + 1
     set_session(user_id, sess)
-    ask_question(user_id)
+    ask_question(user_id, feedback)
+
+def generate_and_start(user_id, text):
+    # Shed generation fast when overloaded instead of queueing behind it
+    with admit(generation_budget, user_id) as admitted:
+        if not admitted:
+            send_message(user_id, BUSY_MESSAGE)
+            return
+        if not generation_quota.allow(user_id):
+            send_message(user_id, QUOTA_MESSAGE)
+            return
+        questions = generate_quiz_from_text(text, num_q=7)
+    start_quiz(user_id, questions)
+
+def handle_file(sender_id, file_url):
+    # Don't spend an extraction slot on text that could not be turned into a quiz
+    shed_message = generation_shed_message(sender_id)
+    if shed_message:
+        send_message(sender_id, shed_message)
+        return
+
+    with admit(extraction_budget, sender_id) as admitted:
+        if not admitted:
+            send_message(sender_id, BUSY_MESSAGE)
+            return
+        text, cleaned_text = extract_text_from_url(file_url)
+
+    if not text.strip():
+        send_message(sender_id, "❌ Could not extract text from the file. Please try another file.")
+        send_menu(sender_id)
+        return
+
+    if len(cleaned_text.split()) < 20:
+        send_message(sender_id, "⚠️ Not enough readable text found. Using general fallback topic.")
+        cleaned_text = "General knowledge and facts"
+
+    generate_and_start(sender_id, cleaned_text)
 
 def handle_text(user_id, text):
     sess = get_session(user_id) or {"state": "awaiting_menu"}
@@ -80,17 +137,17 @@ def handle_text(user_id, text):
                 send_message(user_id, "📝 Enter a topic or text for quiz generation:")
                 set_session(user_id, {"state": "awaiting_topic"})
             elif text.startswith("3"):
-                questions = generate_quiz_from_text("General knowledge and facts", num_q=7)
-                start_quiz(user_id, questions)
+                generate_and_start(user_id, "General knowledge and facts")
             else:
                 send_menu(user_id)
 
         elif sess["state"] == "awaiting_topic":
-            questions = generate_quiz_from_text(text, num_q=7)
-            start_quiz(user_id, questions)
+            generate_and_start(user_id, text)
 
         elif sess["state"] == "in_quiz":
-            handle_answer(user_id, text)
+            # Answers are always served, waiting for a slot if needed
+            with admit(answer_budget, user_id, wait=True):
+                handle_answer(user_id, text)
 
         elif sess["state"] == "awaiting_file":
             send_message(user_id, "📄 Please send a file, not text.")
@@ -115,46 +172,57 @@ def webhook():
     data = request.json
     print(f"Webhook data: {data}")
 
+    process_webhook(data)
+    return "ok", 200
+
+def process_webhook(data):
     try:
         for entry in data.get("entry", []):
             for event in entry.get("messaging", []):
                 sender_id = event["sender"]["id"]
 
-                if "postback" in event:
-                    payload = event["postback"].get("payload")
-                    handle_postback(sender_id, payload, send_message, set_session)
-                    continue
-
-                if "message" in event:
-                    if "attachments" in event["message"]:
-                        for att in event["message"]["attachments"]:
-                            if att["type"] == "file":
-                                file_url = att["payload"]["url"]
-                                text = extract_text_from_url(file_url)
-
-                                if not text.strip():
-                                    send_message(sender_id, "❌ Could not extract text from the file. Please try another file.")
-                                    send_menu(sender_id)
-                                    return "ok", 200
-
-                                cleaned_text = clean_text(text)
-                                if len(cleaned_text.split()) < 20:
-                                    send_message(sender_id, "⚠️ Not enough readable text found. Using general fallback topic.")
-                                    cleaned_text = "General knowledge and facts"
-
-                                questions = generate_quiz_from_text(cleaned_text, num_q=7)
-                                start_quiz(sender_id, questions)
-                                return "ok", 200
-
-                    elif "text" in event["message"]:
-                        handle_text(sender_id, event["message"]["text"])
+                with WEBHOOK_SECONDS.time(), start_trace("webhook_event", sender_id=sender_id):
+                    if "postback" in event:
+                        WEBHOOK_EVENTS.inc("postback")
+                        payload = event["postback"].get("payload")
+                        handle_postback(sender_id, payload, send_message, set_session)
+                        continue
+
+                    if "message" in event:
+                        if "attachments" in event["message"]:
+                            for att in event["message"]["attachments"]:
+                                if att["type"] == "file":
+                                    WEBHOOK_EVENTS.inc("file")
+                                    handle_file(sender_id, att["payload"]["url"])
+                                    return
+
+                        elif "text" in event["message"]:
+                            WEBHOOK_EVENTS.inc("text")
+                            handle_text(sender_id, event["message"]["text"])
 
     except Exception as e:
         print(f"Webhook processing error: {e}")
 
-    return "ok", 200
+@app.route("/debug/profile", methods=["POST"])
+def debug_profile():
+    if not PROFILE_TOKEN or request.args.get("token") != PROFILE_TOKEN:
+        return "Forbidden", 403
+    seconds = profiler.parse_seconds(request.args.get("seconds", PROFILE_SECONDS))
+    if seconds is None:
+        return "seconds must be a positive number", 400
+    if not profiler.start(seconds):
+        return "Profiling already running", 409
+    return "Profiling started", 202
+
+@app.route("/metrics")
+def metrics():
+    return render_metrics(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
 
 if __name__ == "__main__":
-    setup_get_started_button()
+    profiler.install_signal_handler()
+    # Serve right away; profile setup and parser warm-up happen in the background
+    setup_get_started_button_in_background()
+    if WARM_UP_PARSERS:
+        threading.Thread(target=warm_up, daemon=True, name="warm-up").start()
     port = int(os.getenv("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
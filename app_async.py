@@ -0,0 +1,254 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+import async_api
+from async_api import send_message, send_menu, send_composed, extract_text_from_url, generate_quiz_from_text
+from facebook_api import MENU_TEXT, MENU_OPTIONS
+from quiz import format_question_message
+from session_manager import get_session, set_session
+from get_started import setup_get_started_button
+from config import VERIFY_TOKEN, PROFILE_TOKEN, PROFILE_SECONDS
+from tracing import start_trace
+import profiler
+from metrics import render_metrics, WEBHOOK_EVENTS, WEBHOOK_SECONDS, WEBHOOK_ACK_SECONDS, QUIZ_SEND_CALLS
+from admission import (
+    admit, generation_budget, extraction_budget, generation_quota,
+    generation_shed_message, BUSY_MESSAGE, QUOTA_MESSAGE,
+)
+
+QUIZ_REPLIES = ["A", "B", "C", "D", "Quit"]
+
+# Latest pending task per user, so one user's events are handled in order
+_user_tasks = {}
+
+async def start_quiz(user_id, questions):
+    if not questions:
+        await send_composed(user_id, ["No quiz could be generated. Please try again.", MENU_TEXT], MENU_OPTIONS)
+        return
+    set_session(user_id, {"state": "in_quiz", "questions": questions, "index": 0, "score": 0, "sends": 0})
+    await ask_question(user_id)
+
+def finish_quiz(user_id, sess, sends):
+    total = sess.get("sends", 0) + sends
+    QUIZ_SEND_CALLS.observe(total)
+    print(f"Quiz ended for {user_id}: {total} Send API calls")
+    set_session(user_id, {"state": "awaiting_menu"})
+
+async def ask_question(user_id, feedback=None):
+    sess = get_session(user_id)
+    if not sess:
+        await send_menu(user_id)
+        return
+    idx = sess.get("index", 0)
+    questions = sess.get("questions", [])
+    if idx >= len(questions):
+        sends = await send_composed(
+            user_id,
+            [feedback, f"✅ Quiz finished! Score: {sess.get('score',0)}/{len(questions)}", MENU_TEXT],
+            MENU_OPTIONS,
+        )
+        finish_quiz(user_id, sess, sends)
+        return
+
+    question_text = format_question_message(questions[idx])
+    sess["sends"] = sess.get("sends", 0) + await send_composed(user_id, [feedback, question_text], QUIZ_REPLIES)
+    set_session(user_id, sess)
+
+async def handle_answer(user_id, text):
+    sess = get_session(user_id)
+    if not sess or sess.get("state") != "in_quiz":
+        await send_menu(user_id)
+        return
+
+    if text.strip().lower() == "quit":
+        sends = await send_composed(user_id, ["🛑 Quiz exited. Returning to main menu.", MENU_TEXT], MENU_OPTIONS)
+        finish_quiz(user_id, sess, sends)
+        return
+
+    idx = sess.get("index", 0)
+    questions = sess.get("questions", [])
+    if idx >= len(questions):
+        await send_menu(user_id)
+        return
+
+    q = questions[idx]
+    user_answer = text.strip().upper()
+    correct_answer = q.get("answer", "").upper()
+    if user_answer.startswith(correct_answer):
+        feedback = "✅ Correct!"
+        sess["score"] = sess.get("score", 0) + 1
+    else:
+        correct_text = q["options"].get(correct_answer, "N/A")
+        feedback = f"❌ Incorrect. Correct: {correct_answer}) {correct_text}"
+    sess["index"] = idx + 1
+    set_session(user_id, sess)
+    await ask_question(user_id, feedback)
+
+async def generate_and_start(user_id, text):
+    # Shed generation fast when overloaded instead of queueing behind it
+    with admit(generation_budget, user_id) as admitted:
+        if not admitted:
+            await send_message(user_id, BUSY_MESSAGE)
+            return
+        if not generation_quota.allow(user_id):
+            await send_message(user_id, QUOTA_MESSAGE)
+            return
+        questions = await generate_quiz_from_text(text, num_q=7)
+    await start_quiz(user_id, questions)
+
+async def handle_text(user_id, text):
+    sess = get_session(user_id) or {"state": "awaiting_menu"}
+
+    try:
+        if sess["state"] == "awaiting_menu":
+            if text.startswith("1"):
+                await send_message(user_id, "📄 Please upload your file now.")
+                set_session(user_id, {"state": "awaiting_file"})
+            elif text.startswith("2"):
+                await send_message(user_id, "📝 Enter a topic or text for quiz generation:")
+                set_session(user_id, {"state": "awaiting_topic"})
+            elif text.startswith("3"):
+                await generate_and_start(user_id, "General knowledge and facts")
+            else:
+                await send_menu(user_id)
+
+        elif sess["state"] == "awaiting_topic":
+            await generate_and_start(user_id, text)
+
+        elif sess["state"] == "in_quiz":
+            await handle_answer(user_id, text)
+
+        elif sess["state"] == "awaiting_file":
+            await send_message(user_id, "📄 Please send a file, not text.")
+
+        else:
+            await send_menu(user_id)
+
+    except Exception as e:
+        print(f"handle_text error: {e}")
+        await send_message(user_id, "⚠️ An error occurred. Please try again.")
+        await send_menu(user_id)
+
+async def handle_attachments(sender_id, attachments):
+    for att in attachments:
+        if att["type"] == "file":
+            # Don't spend an extraction slot on text that could not be turned into a quiz
+            shed_message = generation_shed_message(sender_id)
+            if shed_message:
+                await send_message(sender_id, shed_message)
+                return
+
+            with admit(extraction_budget, sender_id) as admitted:
+                if not admitted:
+                    await send_message(sender_id, BUSY_MESSAGE)
+                    return
+                text, cleaned_text = await extract_text_from_url(att["payload"]["url"])
+
+            if not text.strip():
+                await send_message(sender_id, "❌ Could not extract text from the file. Please try another file.")
+                await send_menu(sender_id)
+                return
+
+            if len(cleaned_text.split()) < 20:
+                await send_message(sender_id, "⚠️ Not enough readable text found. Using general fallback topic.")
+                cleaned_text = "General knowledge and facts"
+
+            await generate_and_start(sender_id, cleaned_text)
+            return
+
+async def handle_event(event):
+    sender_id = event["sender"]["id"]
+
+    if "postback" in event:
+        WEBHOOK_EVENTS.inc("postback")
+        if event["postback"].get("payload") == "GET_STARTED":
+            await send_message(sender_id, "Welcome! Let's get started.")
+            await send_menu(sender_id)
+            set_session(sender_id, {"state": "awaiting_menu"})
+        return
+
+    if "message" in event:
+        if "attachments" in event["message"]:
+            WEBHOOK_EVENTS.inc("file")
+            await handle_attachments(sender_id, event["message"]["attachments"])
+        elif "text" in event["message"]:
+            WEBHOOK_EVENTS.inc("text")
+            await handle_text(sender_id, event["message"]["text"])
+
+def dispatch(event):
+    sender_id = event["sender"]["id"]
+    previous = _user_tasks.get(sender_id)
+
+    async def run():
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            with WEBHOOK_SECONDS.time(), start_trace("webhook_event", sample_profile=False, sender_id=sender_id):
+                await handle_event(event)
+        except Exception as e:
+            print(f"Webhook processing error: {e}")
+        finally:
+            if _user_tasks.get(sender_id) is task:
+                del _user_tasks[sender_id]
+
+    task = asyncio.create_task(run())
+    _user_tasks[sender_id] = task
+
+async def verify(request):
+    token = request.query.get("hub.verify_token")
+    challenge = request.query.get("hub.challenge")
+    if token == VERIFY_TOKEN:
+        return web.Response(text=challenge or "ok")
+    return web.Response(text="Invalid token", status=403)
+
+async def webhook(request):
+    with WEBHOOK_ACK_SECONDS.time():
+        try:
+            data = await request.json()
+            # Acknowledge right away; events are handled in the background
+            for entry in data.get("entry", []):
+                for event in entry.get("messaging", []):
+                    dispatch(event)
+        except Exception as e:
+            print(f"Webhook processing error: {e}")
+    return web.Response(text="ok")
+
+async def debug_profile(request):
+    if not PROFILE_TOKEN or request.query.get("token") != PROFILE_TOKEN:
+        return web.Response(text="Forbidden", status=403)
+    seconds = profiler.parse_seconds(request.query.get("seconds", PROFILE_SECONDS))
+    if seconds is None:
+        return web.Response(text="seconds must be a positive number", status=400)
+    if not profiler.start(seconds):
+        return web.Response(text="Profiling already running", status=409)
+    return web.Response(text="Profiling started", status=202)
+
+async def metrics(request):
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+async def on_startup(app):
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, setup_get_started_button)
+    # With WARM_UP_PARSERS, extraction workers import the parsers via the pool initializer
+
+async def on_cleanup(app):
+    if _user_tasks:
+        await asyncio.wait(list(_user_tasks.values()), timeout=10)
+    await async_api.close()
+
+def create_app():
+    app = web.Application()
+    app.router.add_get("/webhook", verify)
+    app.router.add_post("/webhook", webhook)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_post("/debug/profile", debug_profile)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", 5000))
+    profiler.install_signal_handler()
+    web.run_app(create_app(), host="0.0.0.0", port=port)
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import aiohttp
+
+from config import HTTP_POOL_SIZE, EXTRACT_WORKERS, MODEL, WARM_UP_PARSERS
+from facebook_api import MESSAGES_URL, MENU_TEXT, MENU_OPTIONS
+from file_utils import extract_and_clean, file_type, warm_up
+from message_composer import compose_messages
+from quiz import OPENROUTER_URL, build_quiz_request, parse_completion
+from metrics import SEND_SECONDS, DOWNLOAD_SECONDS, EXTRACT_SECONDS, LLM_SECONDS
+from tracing import span, traced
+
+# One pooled HTTP session and one extraction pool per process
+_http_session = None
+_extract_pool = None
+
+async def get_http_session():
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300)
+        _http_session = aiohttp.ClientSession(connector=connector)
+    return _http_session
+
+def get_extract_pool():
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, initializer=warm_up if WARM_UP_PARSERS else None)
+    return _extract_pool
+
+def _discard_extract_pool(pool):
+    global _extract_pool
+    # Other tasks may already have replaced the broken pool
+    if _extract_pool is pool:
+        _extract_pool = None
+    pool.shutdown(wait=False)
+
+async def _extract_in_pool(file_url, content):
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_extract_pool()
+        try:
+            return await loop.run_in_executor(pool, extract_and_clean, file_url, content)
+        except BrokenProcessPool:
+            # A worker died (crash or OOM kill); start a fresh pool and retry once
+            print(f"extraction pool broken, restarting (attempt {attempt + 1})")
+            _discard_extract_pool(pool)
+            if attempt:
+                raise
+
+async def close():
+    global _http_session, _extract_pool
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+    if _extract_pool is not None:
+        _extract_pool.shutdown(wait=False)
+        _extract_pool = None
+
+async def _post_message(payload, label):
+    start = time.perf_counter()
+    status = "error"
+    try:
+        session = await get_http_session()
+        async with session.post(MESSAGES_URL, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as r:
+            status = str(r.status)
+            r.raise_for_status()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"FB {label} error: {e}")
+    finally:
+        SEND_SECONDS.observe(time.perf_counter() - start, status)
+
+@traced()
+async def send_message(recipient_id, text):
+    payload = {"recipient": {"id": recipient_id}, "message": {"text": text}}
+    await _post_message(payload, "send_message")
+
+@traced()
+async def send_quick_replies(recipient_id, text, replies):
+    quick_replies = [{"content_type": "text", "title": r, "payload": r} for r in replies]
+    payload = {
+        "recipient": {"id": recipient_id},
+        "message": {"text": text, "quick_replies": quick_replies}
+    }
+    await _post_message(payload, "send_quick_replies")
+
+async def send_menu(recipient_id):
+    await send_quick_replies(recipient_id, MENU_TEXT, MENU_OPTIONS)
+
+async def send_composed(recipient_id, parts, replies=None):
+    sends = 0
+    for text, quick_replies in compose_messages(parts, replies):
+        if quick_replies:
+            await send_quick_replies(recipient_id, text, quick_replies)
+        else:
+            await send_message(recipient_id, text)
+        sends += 1
+    return sends
+
+@traced()
+async def extract_text_from_url(file_url):
+    """Download and extract a file; returns (raw text, cleaned text)."""
+    try:
+        session = await get_http_session()
+        with DOWNLOAD_SECONDS.track(), span("download"):
+            async with session.get(file_url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                resp.raise_for_status()
+                content = await resp.read()
+        # PDF/DOCX parsing and cleaning are CPU-bound, keep them off the event loop
+        kind = file_type(file_url)
+        with EXTRACT_SECONDS.track(kind), span("extract", file_type=kind):
+            return await _extract_in_pool(file_url, content)
+    except asyncio.TimeoutError:
+        print(f"extract_text_from_url error: request timed out for {file_url}")
+    except Exception as e:
+        print(f"extract_text_from_url error: {e}")
+    return "", ""
+
+@traced()
+async def generate_quiz_from_text(text, num_q=5):
+    headers, data = build_quiz_request(text, num_q)
+    try:
+        session = await get_http_session()
+        with LLM_SECONDS.track(MODEL):
+            async with session.post(OPENROUTER_URL, headers=headers, json=data, timeout=aiohttp.ClientTimeout(total=30)) as r:
+                r.raise_for_status()
+                resp_json = await r.json()
+        return await asyncio.get_running_loop().run_in_executor(None, parse_completion, resp_json)
+    except asyncio.TimeoutError:
+        print("LLM request timed out")
+    except Exception as e:
+        print(f"LLM error: {e}")
+    return []
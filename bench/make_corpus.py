@@ -0,0 +1,120 @@
+"""Regenerate the checked-in PDF/DOCX benchmark corpus.
+
+    python -m bench.make_corpus
+
+Only needs the standard library, so the corpus does not depend on the
+versions of the PDF/DOCX libraries being benchmarked.
+"""
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# (file name, pages or paragraphs)
+PDF_SIZES = [("lecture-1p.pdf", 1), ("lecture-10p.pdf", 10), ("lecture-50p.pdf", 50)]
+DOCX_SIZES = [("notes-20.docx", 20), ("notes-200.docx", 200), ("notes-2000.docx", 2000)]
+
+LINES = [
+    "NCMB 312 - Care of Clients with Problems in Oxygenation",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The light reactions occur in the thylakoid membranes of the chloroplast.",
+    "The Calvin cycle fixes carbon dioxide in the stroma using ATP and NADPH.",
+    "Cellular respiration releases energy through glycolysis and the Krebs cycle.",
+    "Mitochondria produce most of the ATP used by eukaryotic cells.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "Kinetic energy depends on both the mass and the velocity of an object.",
+    "The French Revolution began in 1789 and reshaped European politics.",
+    "A fraction represents a part of a whole, written as numerator over denominator.",
+]
+
+def _line(i):
+    return f"{i + 1}. {LINES[i % len(LINES)]}"
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages, lines_per_page=40):
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for p in range(pages):
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for i in range(lines_per_page):
+            ops.append(f"({_pdf_escape(_line(p * lines_per_page + i))}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_num = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_num
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>"""
+
+def make_docx(paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{escape(_line(i))}</w:t></w:r></w:p>" for i in range(paragraphs))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    path = os.path.join(CORPUS_DIR, "_tmp.docx")
+    # Fixed timestamps keep the output byte-for-byte reproducible
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in [
+            ("[Content_Types].xml", CONTENT_TYPES),
+            ("_rels/.rels", ROOT_RELS),
+            ("word/_rels/document.xml.rels", DOCUMENT_RELS),
+            ("word/document.xml", document),
+        ]:
+            info = zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, data)
+    with open(path, "rb") as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+def main():
+    for name, pages in PDF_SIZES:
+        with open(os.path.join(CORPUS_DIR, name), "wb") as f:
+            f.write(make_pdf(pages))
+    for name, paragraphs in DOCX_SIZES:
+        with open(os.path.join(CORPUS_DIR, name), "wb") as f:
+            f.write(make_docx(paragraphs))
+    print(f"Wrote corpus to {CORPUS_DIR}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Time and peak-memory benchmarks for the text hot paths.
+
+    python -m bench.run                    # compare against bench/baseline.json
+    python -m bench.run --save-baseline    # record a new baseline
+    python -m bench.run --threshold 3 --only parse_questions
+
+Exits non-zero when a case is slower (or uses more peak memory) than
+``threshold`` times its baseline. Baselines are machine specific, so record
+them on the same hardware the comparison runs on.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+
+from file_utils import clean_text, preprocess_for_quiz, extract_text_from_content
+from quiz import parse_questions, format_question_message
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+TEXT_SIZES = [1_000, 10_000, 100_000]
+
+def _read(path, mode="rb"):
+    with open(path, mode) as f:
+        return f.read()
+
+def sample_text(size):
+    """Extracted-looking text: the DOCX corpus text plus PDF operator noise."""
+    base = extract_text_from_content("notes.docx", _read(os.path.join(CORPUS_DIR, "notes-200.docx")))
+    noisy = base.replace("\n", " /F1 12 Tf BT\n\t", 50)
+    return (noisy * (size // len(noisy) + 1))[:size]
+
+HEADER_LINES = ["NCMB 312 LECTURE NOTES", "BACHELOR OF SCIENCE IN NURSING", "COURSE OUTLINE", "✓ Reviewed", "12"]
+
+def lesson_text(size):
+    """Lesson lines without list numbering, with a header line every fifth line,
+    so preprocess_for_quiz both drops and keeps lines."""
+    base = extract_text_from_content("notes.docx", _read(os.path.join(CORPUS_DIR, "notes-200.docx")))
+    lines = []
+    for i, line in enumerate(base.splitlines()):
+        if i % 5 == 0:
+            lines.append(HEADER_LINES[(i // 5) % len(HEADER_LINES)])
+        lines.append(re.sub(r"^\d+\.\s*", "", line))
+    text = "\n".join(lines)
+    return (text * (size // len(text) + 1))[:size]
+
+def build_cases():
+    """Yield (name, func, args) for every benchmark case."""
+    for size in TEXT_SIZES:
+        text = sample_text(size)
+        yield f"clean_text[{size}]", clean_text, (text,)
+        yield f"preprocess_for_quiz[{size}]", preprocess_for_quiz, (lesson_text(size),)
+
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "completions", "*.txt"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        yield f"parse_questions[{name}]", parse_questions, (_read(path, "r"),)
+
+    questions = parse_questions(_read(os.path.join(CORPUS_DIR, "completions", "long.txt"), "r"))
+    yield "format_question_message[200]", lambda qs: [format_question_message(q) for q in qs], (questions,)
+
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.pdf")) + glob.glob(os.path.join(CORPUS_DIR, "*.docx"))):
+        name = os.path.basename(path)
+        yield f"extract[{name}]", extract_text_from_content, (name, _read(path))
+
+def measure(func, args, repeat=5):
+    """Return (best seconds per call, peak traced bytes) for func(*args)."""
+    timer = timeit.Timer(lambda: func(*args))
+    # Batch calls so each timing covers at least 0.2s, then keep the best batch
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+def compare(results, baseline, threshold):
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("seconds", "peak_bytes"):
+            if base[key] and result[key] > base[key] * threshold:
+                failures.append(f"{name} {key}: {result[key]:.6g} vs baseline {base[key]:.6g} "
+                                f"({result[key] / base[key]:.2f}x > {threshold}x)")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "2.0")),
+                        help="allowed ratio to baseline before failing")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--only", help="run cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=5, help="timing batches per case")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<40}{'best ms':>12}{'peak KiB':>12}")
+    for name, func, func_args in build_cases():
+        if args.only and args.only not in name:
+            continue
+        seconds, peak = measure(func, func_args, args.repeat)
+        results[name] = {"seconds": seconds, "peak_bytes": peak}
+        print(f"{name:<40}{seconds * 1000:>12.3f}{peak / 1024:>12.1f}")
+
+    if args.save_baseline:
+        baseline = {}
+        if args.only and os.path.exists(args.baseline):
+            baseline = json.loads(_read(args.baseline, "r"))
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    failures = compare(results, json.loads(_read(args.baseline, "r")), args.threshold)
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold}x baseline")
+
+if __name__ == "__main__":
+    main()
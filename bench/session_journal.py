@@ -0,0 +1,66 @@
+"""Cost of session journaling on the answer hot path, and of restart replay.
+
+    python -m bench.session_journal --sessions 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+QUESTION = {
+    "question": "Which process converts light energy into chemical energy?",
+    "options": {"A": "Photosynthesis", "B": "Respiration", "C": "Fermentation", "D": "Transpiration"},
+    "answer": "A",
+}
+
+def quiz_session(i):
+    return {"state": "in_quiz", "questions": [QUESTION] * 7, "index": i % 7, "score": i % 5, "sends": i % 7}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    args = parser.parse_args()
+
+    # The journal is configured from the environment at import time
+    journal_dir = tempfile.mkdtemp(prefix="session-journal-")
+    os.environ["SESSION_JOURNAL_DIR"] = journal_dir
+    os.environ["SESSION_COMPACT_RECORDS"] = str(10 * args.sessions)
+    import session_journal
+    import session_manager
+
+    sess = quiz_session(0)
+    timer = timeit.Timer(lambda: session_manager.set_session("bench-user", sess))
+    number, _ = timer.autorange()
+    with_journal = min(timer.repeat(5, number)) / number
+
+    session_journal.stop()
+    timer = timeit.Timer(lambda: session_manager.set_session("bench-user", sess))
+    without_journal = min(timer.repeat(5, number)) / number
+    print(f"set_session: {with_journal * 1e6:.2f} us with journal, {without_journal * 1e6:.2f} us without")
+
+    # Measure flush and replay on a journal that holds one record per session
+    session_journal.start(session_manager._copy_sessions)
+    for i in range(args.sessions):
+        session_manager.set_session(f"user-{i}", quiz_session(i))
+    start = time.perf_counter()
+    session_journal.flush()
+    print(f"flush of {args.sessions} coalesced records: {(time.perf_counter() - start) * 1000:.1f} ms (one fsync)")
+
+    start = time.perf_counter()
+    session_journal.compact()
+    print(f"compaction to snapshot: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for i in range(0, args.sessions, 2):
+        session_manager.set_session(f"user-{i}", quiz_session(i + 1))
+    session_journal.stop()
+
+    start = time.perf_counter()
+    restored = session_journal.replay()
+    print(f"replay of snapshot + journal: {(time.perf_counter() - start) * 1000:.1f} ms for {len(restored)} sessions")
+    if restored != session_manager.user_sessions:
+        sys.exit("replayed sessions do not match the live store")
+
+if __name__ == "__main__":
+    main()
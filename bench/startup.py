@@ -0,0 +1,100 @@
+"""Worker cold-start benchmark: import time and time to first served request.
+
+    python -m bench.startup --app app2 --runs 5
+
+Each run is a fresh interpreter. The served-request check starts the app
+against the local fake Graph/OpenRouter servers, so it works offline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from loadtest.fake_servers import start_fake_servers
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {app}; print(time.perf_counter() - t)"
+
+def import_time(app):
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(app=app)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+def slowest_imports(app, top=10):
+    """Cumulative import cost per module from ``python -X importtime``."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {app}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].strip()
+            # Only modules the app imports directly, nested ones count towards their parent
+            if parts[2].startswith("   ") and not parts[2].startswith("    "):
+                rows.append((int(parts[1]), name))
+    return sorted(rows, reverse=True)[:top]
+
+def first_request_time(app, port, fake_url, timeout=30):
+    """Seconds from process spawn until the webhook answers a text event."""
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GRAPH_API_URL=f"{fake_url}/v17.0",
+        OPENROUTER_API_URL=f"{fake_url}/api/v1",
+    )
+    event = {"entry": [{"messaging": [{"sender": {"id": "startup"}, "message": {"text": "hi"}}]}]}
+    body = json.dumps(event).encode()
+    url = f"http://127.0.0.1:{port}/webhook"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, f"{app}.py"], cwd=REPO_ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(req, timeout=5) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.01)
+        raise RuntimeError(f"{app} did not serve a request within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app2", choices=["app2", "app_async"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--fake-port", type=int, default=8803)
+    args = parser.parse_args()
+
+    server, behaviour = start_fake_servers(port=args.fake_port, llm_scale=1)
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    try:
+        imports = [import_time(args.app) for _ in range(args.runs)]
+        first = [first_request_time(args.app, args.port, fake_url) for _ in range(args.runs)]
+    finally:
+        server.shutdown()
+
+    print(f"{args.app}: import {statistics.median(imports) * 1000:.0f} ms (median of {args.runs}), "
+          f"first served request {statistics.median(first) * 1000:.0f} ms")
+    print("slowest top-level imports (cumulative ms):")
+    for micros, name in slowest_imports(args.app):
+        print(f"  {micros / 1000:>8.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,35 @@ VERIFY_TOKEN = os.getenv("FB_VERIFY_TOKEN", "verify_token")
 PAGE_ACCESS_TOKEN = os.getenv("FB_PAGE_ACCESS_TOKEN", "")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 MODEL = os.getenv("OPENROUTER_MODEL", "mistralai/mixtral-8x7b-instruct")
+
+# API base URLs, overridable to point at local stand-ins (see loadtest/)
+GRAPH_API_URL = os.getenv("GRAPH_API_URL", "https://graph.facebook.com/v17.0").rstrip("/")
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1").rstrip("/")
+
+# Import the PDF/DOCX parsers at startup instead of on the first upload
+WARM_UP_PARSERS = os.getenv("WARM_UP_PARSERS", "0") == "1"
+
+# Async engine (app_async.py)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "200"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+
+# Admission control, 0 disables a limit
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "8"))
+MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("MAX_CONCURRENT_EXTRACTIONS", "4"))
+MAX_CONCURRENT_ANSWERS = int(os.getenv("MAX_CONCURRENT_ANSWERS", "0"))
+USER_GENERATIONS_PER_WINDOW = int(os.getenv("USER_GENERATIONS_PER_WINDOW", "10"))
+QUOTA_WINDOW_SECONDS = int(os.getenv("QUOTA_WINDOW_SECONDS", "3600"))
+
+# Tracing and on-demand profiling
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "5000"))
+TRACE_LOG = os.getenv("TRACE_LOG", "")  # empty logs slow traces to stdout
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # empty disables /debug/profile
+
+# Session journal for warm restarts, empty disables persistence
+SESSION_JOURNAL_DIR = os.getenv("SESSION_JOURNAL_DIR", "")
+SESSION_FLUSH_MS = float(os.getenv("SESSION_FLUSH_MS", "50"))
+SESSION_COMPACT_RECORDS = int(os.getenv("SESSION_COMPACT_RECORDS", "10000"))
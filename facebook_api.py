@@ -1,35 +1,47 @@
+import time
 import requests
-from config import PAGE_ACCESS_TOKEN
+from config import PAGE_ACCESS_TOKEN, GRAPH_API_URL
+from metrics import SEND_SECONDS
+from tracing import traced
 
+MESSAGES_URL = f"{GRAPH_API_URL}/me/messages?access_token={PAGE_ACCESS_TOKEN}"
+
+MENU_TEXT = "📋 Main Menu:\nChoose an option:"
+MENU_OPTIONS = ["1️⃣ Upload a file for quiz", "2️⃣ Enter a topic for quiz", "3️⃣ Random quiz"]
+
+def _post_message(payload):
+    start = time.perf_counter()
+    status = "error"
+    try:
+        r = requests.post(MESSAGES_URL, json=payload)
+        status = str(r.status_code)
+        r.raise_for_status()
+    finally:
+        SEND_SECONDS.observe(time.perf_counter() - start, status)
+
+@traced()
 def send_message(recipient_id, text):
     try:
         print(f"Sending to {recipient_id}: {text}")
-        url = f"https://graph.facebook.com/v17.0/me/messages?access_token={PAGE_ACCESS_TOKEN}"
         payload = {"recipient": {"id": recipient_id}, "message": {"text": text}}
-        r = requests.post(url, json=payload)
-        r.raise_for_status()
+        _post_message(payload)
     except requests.RequestException as e:
         print(f"FB send_message error: {e}")
 
+@traced()
 def send_quick_replies(recipient_id, text, replies):
     try:
-        url = f"https://graph.facebook.com/v17.0/me/messages?access_token={PAGE_ACCESS_TOKEN}"
         quick_replies = [{"content_type": "text", "title": r, "payload": r} for r in replies]
         payload = {
             "recipient": {"id": recipient_id},
             "message": {"text": text, "quick_replies": quick_replies}
         }
-        r = requests.post(url, json=payload)
-        r.raise_for_status()
+        _post_message(payload)
     except requests.RequestException as e:
         print(f"FB send_quick_replies error: {e}")
 
 def send_menu(recipient_id):
     try:
-        send_quick_replies(
-            recipient_id,
-            "📋 Main Menu:\nChoose an option:",
-            ["1️⃣ Upload a file for quiz", "2️⃣ Enter a topic for quiz", "3️⃣ Random quiz"]
-        )
+        send_quick_replies(recipient_id, MENU_TEXT, MENU_OPTIONS)
     except Exception as e:
         print(f"send_menu error: {e}")
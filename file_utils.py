@@ -1,9 +1,10 @@
 import requests
 import re
 from io import BytesIO
-from PyPDF2 import PdfReader
-import docx
+from metrics import DOWNLOAD_SECONDS, EXTRACT_SECONDS
+from tracing import span, traced
 
+@traced()
 def clean_text(text):
     try:
         text = re.sub(r'\s+', ' ', text)
@@ -16,26 +17,69 @@ def clean_text(text):
         print(f"clean_text error: {e}")
         return ""
 
+def preprocess_for_quiz(text):
+    """Remove headers, course codes, checkmarks, and non-lesson content."""
+    content_lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        # Skip empty lines, course codes, numbers at the start, or checklist symbols
+        if not line or re.match(r'^(NCMB|BACHELOR|COURSE|✓|[0-9]+)', line):
+            continue
+        content_lines.append(line)
+    return " ".join(content_lines)
+
+def file_type(file_url):
+    lower = file_url.lower()
+    if lower.endswith(".pdf"):
+        return "pdf"
+    if lower.endswith((".docx", ".doc")):
+        return "docx"
+    return "text"
+
+def extract_text_from_content(file_url, content):
+    kind = file_type(file_url)
+    # Parser libraries are imported on first use, see warm_up()
+    if kind == "pdf":
+        from PyPDF2 import PdfReader
+        pdf = PdfReader(BytesIO(content))
+        texts = []
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                texts.append(text)
+        return "\n".join(texts)
+    elif kind == "docx":
+        import docx
+        doc = docx.Document(BytesIO(content))
+        return "\n".join(p.text for p in doc.paragraphs)
+    else:
+        return content.decode("utf-8", errors="ignore")
+
+def extract_and_clean(file_url, content):
+    """Extract and clean in one call, so a process pool runs both off the event loop."""
+    text = extract_text_from_content(file_url, content)
+    return text, clean_text(text)
+
+def warm_up():
+    """Import the PDF/DOCX parsers ahead of the first upload."""
+    try:
+        import PyPDF2
+        import docx
+    except Exception as e:
+        print(f"warm_up error: {e}")
+
+@traced()
 def extract_text_from_url(file_url):
+    """Download and extract a file; returns (raw text, cleaned text)."""
     try:
-        resp = requests.get(file_url, timeout=10)
-        resp.raise_for_status()
-        content = resp.content
-        if file_url.lower().endswith(".pdf"):
-            pdf = PdfReader(BytesIO(content))
-            texts = []
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    texts.append(text)
-            return "\n".join(texts)
-        elif file_url.lower().endswith((".docx", ".doc")):
-            doc = docx.Document(BytesIO(content))
-            return "\n".join(p.text for p in doc.paragraphs)
-        else:
-            return content.decode("utf-8", errors="ignore")
+        with DOWNLOAD_SECONDS.track(), span("download"):
+            resp = requests.get(file_url, timeout=10)
+            resp.raise_for_status()
+        kind = file_type(file_url)
+        with EXTRACT_SECONDS.track(kind), span("extract", file_type=kind):
+            return extract_and_clean(file_url, resp.content)
     except requests.Timeout:
         print(f"extract_text_from_url error: request timed out for {file_url}")
     except Exception as e:
         print(f"extract_text_from_url error: {e}")
-    return ""
+    return "", ""
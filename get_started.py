@@ -1,17 +1,37 @@
+import threading
 import requests
-from config import PAGE_ACCESS_TOKEN
+from config import PAGE_ACCESS_TOKEN, GRAPH_API_URL
 from facebook_api import send_menu
 
+def get_started_configured(url):
+    # A failed read is treated as "not configured" so the write still happens
+    try:
+        r = requests.get(url, params={"fields": "get_started"}, timeout=10)
+        r.raise_for_status()
+        return any(d.get("get_started", {}).get("payload") == "GET_STARTED" for d in r.json().get("data", []))
+    except (requests.RequestException, ValueError, AttributeError) as e:
+        print(f"Could not read Get Started setting, setting it anyway: {e}")
+        return False
+
 def setup_get_started_button():
-    url = f"https://graph.facebook.com/v17.0/me/messenger_profile?access_token={PAGE_ACCESS_TOKEN}"
+    url = f"{GRAPH_API_URL}/me/messenger_profile?access_token={PAGE_ACCESS_TOKEN}"
     payload = {"get_started": {"payload": "GET_STARTED"}}
     try:
+        # Profile settings persist on the page, so restarts usually skip the write
+        if get_started_configured(url):
+            print("✅ Get Started button already set.")
+            return
         r = requests.post(url, json=payload, timeout=10)
         r.raise_for_status()
         print("✅ Get Started button set.")
     except requests.RequestException as e:
         print(f"Error setting Get Started button: {e}")
 
+def setup_get_started_button_in_background():
+    thread = threading.Thread(target=setup_get_started_button, daemon=True, name="get-started")
+    thread.start()
+    return thread
+
 def handle_postback(sender_id, payload, send_message_func, session_set_func):
     try:
         if payload == "GET_STARTED":
@@ -0,0 +1,212 @@
+"""Local stand-ins for the Graph Send API, OpenRouter and attachment hosting.
+
+Attachments under ``/files/`` come from the PDF and DOCX files in ``bench/corpus``.
+
+Run standalone with ``python -m loadtest.fake_servers`` and point the bot at it:
+
+    GRAPH_API_URL=http://127.0.0.1:8801/v17.0
+    OPENROUTER_API_URL=http://127.0.0.1:8801/api/v1
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_COMPLETION = "\n\n".join(
+    f"Question {i}: Which statement about topic {i} is correct?\n"
+    f"A) The first option\nB) The second option\nC) The third option\nD) The fourth option\n"
+    f"Answer: {'ABCD'[i % 4]}"
+    for i in range(1, 8)
+)
+
+SAMPLE_NOTES = " ".join(
+    f"Lesson {i} explains how plants convert sunlight, water and carbon dioxide into glucose and oxygen."
+    for i in range(1, 40)
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "corpus")
+
+# Attachments served under /files/<n>/<name>: the benchmark PDFs and DOCX files plus plain notes
+ATTACHMENTS = {"notes.txt": SAMPLE_NOTES.encode()}
+for _path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.pdf")) + glob.glob(os.path.join(CORPUS_DIR, "*.docx"))):
+    with open(_path, "rb") as _f:
+        ATTACHMENTS[os.path.basename(_path)] = _f.read()
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+class FakeBehaviour:
+    """Latency, error and throttling knobs shared by all fake endpoints."""
+
+    def __init__(self, latency_ms=50, jitter_ms=20, error_rate=0.0, rate_limit=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.get_started_set = False
+        # recipient id -> texts delivered through the Send API, in order
+        self.replies = {}
+        self._replied = threading.Condition(self._lock)
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def record_reply(self, recipient_id, text):
+        with self._replied:
+            self.replies.setdefault(recipient_id, []).append(text)
+            self._replied.notify_all()
+
+    def wait_for_replies(self, recipient_id, seen, timeout):
+        """Return replies to recipient_id after the first ``seen``, waiting up to timeout for one."""
+        deadline = time.monotonic() + timeout
+        with self._replied:
+            while len(self.replies.get(recipient_id, ())) <= seen:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._replied.wait(remaining)
+            return self.replies.get(recipient_id, [])[seen:]
+
+    def throttled(self):
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.rate_limit
+
+    def delay(self, scale=1):
+        latency = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(latency, 0) * scale / 1000)
+
+def make_handler(behaviour, llm_scale):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _fail_or_throttle(self, name):
+            if behaviour.throttled():
+                behaviour.count(f"{name}_throttled")
+                self._reply(429, {"error": {"message": "Too many requests", "code": 613}})
+                return True
+            if random.random() < behaviour.error_rate:
+                behaviour.count(f"{name}_error")
+                self._reply(500, {"error": {"message": "Injected failure"}})
+                return True
+            return False
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path.endswith("/me/messenger_profile"):
+                behaviour.count("messenger_profile_get")
+                data = [{"get_started": {"payload": "GET_STARTED"}}] if behaviour.get_started_set else []
+                self._reply(200, {"data": data})
+                return
+            if path.startswith("/files/"):
+                name = os.path.basename(path)
+                data = ATTACHMENTS.get(name)
+                if data is None:
+                    self._reply(404, {"error": {"message": "Not found"}})
+                    return
+                ext = os.path.splitext(name)[1]
+                behaviour.count(f"file_download{ext.replace('.', '_')}")
+                behaviour.delay()
+                self._reply(200, data, CONTENT_TYPES.get(ext, "text/plain"))
+                return
+            self._reply(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            path = self.path.split("?")[0]
+
+            if path.endswith("/me/messages"):
+                behaviour.count("send")
+                behaviour.delay()
+                if self._fail_or_throttle("send"):
+                    return
+                recipient = body.get("recipient", {}).get("id")
+                behaviour.record_reply(recipient, body.get("message", {}).get("text", ""))
+                self._reply(200, {"recipient_id": recipient, "message_id": f"m_{time.time_ns()}"})
+            elif path.endswith("/me/messenger_profile"):
+                behaviour.count("messenger_profile")
+                behaviour.get_started_set = True
+                self._reply(200, {"result": "success"})
+            elif path.endswith("/chat/completions"):
+                behaviour.count("llm")
+                behaviour.delay(llm_scale)
+                if self._fail_or_throttle("llm"):
+                    return
+                self._reply(200, {"choices": [{"message": {"role": "assistant", "content": SAMPLE_COMPLETION}}]})
+            else:
+                self._reply(404, {"error": {"message": "Not found"}})
+
+    return Handler
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Pooled clients drop keep-alive connections on shutdown; that is not a failure
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def start_fake_servers(host="127.0.0.1", port=8801, behaviour=None, llm_scale=20):
+    """Serve all fake endpoints from one port in a background thread.
+
+    The LLM endpoint sleeps ``llm_scale`` times the configured latency, since
+    completions are much slower than Send API calls.
+    """
+    behaviour = behaviour or FakeBehaviour()
+    server = FakeServer((host, port), make_handler(behaviour, llm_scale))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, behaviour
+
+def add_behaviour_args(parser):
+    parser.add_argument("--fake-port", type=int, default=8801)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--llm-scale", type=float, default=20, help="LLM latency as a multiple of --latency-ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of send/LLM calls that fail")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per second before 429s, 0 = off")
+
+def behaviour_from_args(args):
+    return FakeBehaviour(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+    server, behaviour = start_fake_servers(port=args.fake_port, behaviour=behaviour_from_args(args), llm_scale=args.llm_scale)
+    print(f"Fake Graph/OpenRouter listening on http://127.0.0.1:{args.fake_port}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"stats: {behaviour.stats}")
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,222 @@
+"""Replay Messenger webhook traffic against the bot and report latency.
+
+    python -m loadtest.run --app app2 --users 50 --rate 100 --duration 60
+
+Starts the fake Graph/OpenRouter/file servers and the chosen app with its API
+base URLs pointed at them, then drives simulated users through menu choices,
+topic requests, file uploads and quiz answers. Pass ``--target`` to load an
+already running bot instead (it must be configured against the fakes).
+
+Latency runs from posting an event until the webhook has answered and the
+bot's first reply reached the fake Send API, so it is comparable between
+app2 (which replies before answering the webhook) and app_async (which
+acknowledges first). An event counts as an error when the webhook call fails,
+no reply arrives within --reply-timeout, or a reply reports a failure (no
+quiz generated, generic error, busy or over quota). A failed step ends that
+user's conversation, so its answers are not counted.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from admission import BUSY_MESSAGE, QUOTA_MESSAGE
+from loadtest.fake_servers import ATTACHMENTS, start_fake_servers, add_behaviour_args, behaviour_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUIZ_LENGTH = 7
+
+# Replies that mean the bot could not serve the event
+FAILURE_REPLIES = ("No quiz could be generated", "⚠️ An error occurred", BUSY_MESSAGE, QUOTA_MESSAGE)
+
+class RateLimiter:
+    """Spaces calls evenly at ``rate`` per second across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class Results:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            if not ok:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def text_event(user_id, text):
+    return {"sender": {"id": user_id}, "message": {"text": text}}
+
+def file_event(user_id, file_url):
+    return {
+        "sender": {"id": user_id},
+        "message": {"attachments": [{"type": "file", "payload": {"url": file_url}}]},
+    }
+
+def scenario(user_id, files_url):
+    """One user's conversation as (event type, messaging event) pairs."""
+    choice = random.choice(["random", "topic", "file"])
+    if choice == "random":
+        # Menu choice 3 generates a quiz straight away, so it is timed apart from cheap menu replies
+        events = [("random", text_event(user_id, "3️⃣ Random quiz"))]
+    elif choice == "topic":
+        events = [
+            ("menu", text_event(user_id, "2️⃣ Enter a topic for quiz")),
+            ("topic", text_event(user_id, random.choice(["Photosynthesis", "World War II", "Fractions"]))),
+        ]
+    else:
+        events = [
+            ("menu", text_event(user_id, "1️⃣ Upload a file for quiz")),
+            # A mix of PDF, DOCX and text uploads; the extension picks the bot's extractor
+            ("file", file_event(user_id, f"{files_url}/{random.randint(1, 1000)}/{random.choice(list(ATTACHMENTS))}")),
+        ]
+    events += [("answer", text_event(user_id, random.choice("ABCD"))) for _ in range(QUIZ_LENGTH)]
+    return events
+
+def post_event(webhook_url, event, timeout):
+    body = json.dumps({"object": "page", "entry": [{"messaging": [event]}]}).encode()
+    req = urllib.request.Request(webhook_url, data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+def run_user(user_index, args, behaviour, limiter, results, deadline):
+    n = 0
+    while time.monotonic() < deadline:
+        user_id = f"load-{user_index}-{n}"
+        n += 1
+        seen = 0
+        for kind, event in scenario(user_id, args.files_url):
+            if time.monotonic() >= deadline:
+                return
+            limiter.wait()
+            start = time.perf_counter()
+            ok = post_event(args.target, event, args.timeout)
+            replies = behaviour.wait_for_replies(user_id, seen, args.reply_timeout)
+            elapsed = time.perf_counter() - start
+            seen += len(replies)
+            ok = ok and bool(replies) and not any(
+                marker in reply for reply in replies for marker in FAILURE_REPLIES
+            )
+            results.record(kind, elapsed, ok)
+            if not ok:
+                break
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}?hub.verify_token=x", timeout=1):
+                return True
+        except urllib.error.HTTPError:
+            return True
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    return False
+
+def start_app(args):
+    fake = f"http://127.0.0.1:{args.fake_port}"
+    env = dict(
+        os.environ,
+        PORT=str(args.app_port),
+        GRAPH_API_URL=f"{fake}/v17.0",
+        OPENROUTER_API_URL=f"{fake}/api/v1",
+        USER_GENERATIONS_PER_WINDOW="0",
+    )
+    return subprocess.Popen(
+        [sys.executable, f"{args.app}.py"], cwd=REPO_ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def report(results, elapsed, behaviour):
+    total = sum(len(v) for v in results.latencies.values())
+    total_errors = sum(results.errors.values())
+    print(f"\n{total} events in {elapsed:.1f}s -> {total / elapsed:.1f} events/s, "
+          f"error rate {total_errors / max(total, 1):.2%}")
+    print(f"{'event':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for kind in ("menu", "random", "topic", "file", "answer"):
+        values = sorted(results.latencies.get(kind, []))
+        if not values:
+            continue
+        errors = results.errors.get(kind, 0)
+        print(f"{kind:<8}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}{errors / len(values):>9.1%}")
+    if behaviour is not None:
+        print(f"fake server stats: {behaviour.stats}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app2", choices=["app2", "app_async"])
+    parser.add_argument("--app-port", type=int, default=5055)
+    parser.add_argument("--target", help="webhook URL of an already running bot")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--rate", type=float, default=50, help="target webhook events per second, 0 = unthrottled")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--reply-timeout", type=float, default=60, help="seconds to wait for the bot's first reply")
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    server, behaviour = start_fake_servers(port=args.fake_port, behaviour=behaviour_from_args(args), llm_scale=args.llm_scale)
+    args.files_url = f"http://127.0.0.1:{args.fake_port}/files"
+
+    proc = None
+    if not args.target:
+        proc = start_app(args)
+        args.target = f"http://127.0.0.1:{args.app_port}/webhook"
+    try:
+        if not wait_until_up(args.target):
+            sys.exit(f"Bot did not come up at {args.target}")
+
+        results = Results()
+        limiter = RateLimiter(args.rate)
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = [
+            threading.Thread(target=run_user, args=(i, args, behaviour, limiter, results, deadline), daemon=True)
+            for i in range(args.users)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        report(results, time.monotonic() - start, behaviour)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from facebook_api import send_message, send_quick_replies
+
+# Messenger Send API limits
+MAX_TEXT_LENGTH = 2000
+MAX_QUICK_REPLIES = 13
+
+def compose_messages(parts, replies=None):
+    """Pack text parts into as few messages as fit, quick replies go on the last one."""
+    messages = []
+    current = ""
+    for part in parts:
+        if not part:
+            continue
+        part = part.strip("\n")
+        if not current:
+            current = part
+        elif len(current) + 2 + len(part) <= MAX_TEXT_LENGTH:
+            current = f"{current}\n\n{part}"
+        else:
+            messages.append((current, None))
+            current = part
+    if current:
+        messages.append((current, replies[:MAX_QUICK_REPLIES] if replies else None))
+    return messages
+
+def send_composed(recipient_id, parts, replies=None):
+    """Send the composed messages and return how many Send API calls were made."""
+    sends = 0
+    for text, quick_replies in compose_messages(parts, replies):
+        try:
+            if quick_replies:
+                send_quick_replies(recipient_id, text, quick_replies)
+            else:
+                send_message(recipient_id, text)
+        except Exception as e:
+            print(f"send_composed error: {e}")
+        sends += 1
+    return sends
@@ -0,0 +1,136 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[i] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    @contextmanager
+    def track(self, *labels):
+        """Like time(), with a trailing "ok"/"error" status label."""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.observe(time.perf_counter() - start, *labels, status)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, ("le", bound))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[len(self.buckets)]
+            le = _format_labels(self.labelnames, labels, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {counts[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+class Gauge:
+    """Gauge read from a callback at scrape time, so the hot path pays nothing."""
+
+    def __init__(self, name, help_text, func):
+        self.name = name
+        self.help_text = help_text
+        self.func = func
+        _registry.append(self)
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.func()}"]
+
+def render_metrics():
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            print(f"render_metrics error for {metric.name}: {e}")
+    return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+WEBHOOK_EVENTS = Counter("quizbot_webhook_events_total", "Webhook messaging events by kind.", ("kind",))
+# Both engines time the same work: handling one messaging event end to end.
+# app_async acknowledges before handling, so its ack time is recorded separately.
+WEBHOOK_SECONDS = Histogram("quizbot_webhook_seconds", "Time spent handling one webhook messaging event.")
+WEBHOOK_ACK_SECONDS = Histogram("quizbot_webhook_ack_seconds", "Time to acknowledge a webhook request (app_async).")
+DOWNLOAD_SECONDS = Histogram("quizbot_attachment_download_seconds", "Attachment download time.", ("status",))
+EXTRACT_SECONDS = Histogram(
+    "quizbot_extract_seconds", "Text extraction and cleaning time by file type.", ("file_type", "status")
+)
+LLM_SECONDS = Histogram("quizbot_llm_seconds", "Quiz generation time by model.", ("model", "status"))
+PARSED_QUESTIONS = Histogram(
+    "quizbot_parsed_questions", "Questions yielded per parse_questions call.", buckets=(0, 1, 2, 3, 4, 5, 6, 7, 8, 10)
+)
+SEND_SECONDS = Histogram("quizbot_send_api_seconds", "Send API call latency by status.", ("status",))
+QUIZ_SEND_CALLS = Histogram(
+    "quizbot_quiz_send_calls", "Send API calls per finished or quit quiz.", buckets=(1, 2, 4, 6, 8, 10, 12, 16, 20)
+)
@@ -0,0 +1,125 @@
+import cProfile
+import os
+import pstats
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import PROFILE_DIR, PROFILE_SECONDS, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS
+
+_lock = threading.RLock()  # re-entrant: start() also runs from a signal handler
+# Only one request is profiled at a time; from Python 3.12 cProfile allows a
+# single active profiler per process
+_profile_lock = threading.Lock()
+MAX_PROFILE_SECONDS = 300
+_window_end = 0.0
+_stats = None
+
+def parse_seconds(value):
+    """Window length from a request parameter, clamped to MAX_PROFILE_SECONDS; None if invalid."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not 0 < seconds < float("inf"):
+        return None
+    return min(seconds, MAX_PROFILE_SECONDS)
+
+def is_active():
+    return time.monotonic() < _window_end
+
+def start(seconds=PROFILE_SECONDS):
+    """Open a profiling window on the running process.
+
+    A background thread samples every thread's stack for ``seconds`` and
+    writes folded stacks (flamegraph input). Meanwhile a fraction of traced
+    requests also run under cProfile, and their merged stats are dumped at
+    the end. Returns False if a window is already open.
+    """
+    global _window_end, _stats
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    with _lock:
+        if is_active():
+            return False
+        _window_end = time.monotonic() + seconds
+        _stats = None
+    threading.Thread(target=_sample_stacks, args=(seconds,), daemon=True, name="profiler").start()
+    print(f"Profiling for {seconds}s, writing to {PROFILE_DIR}")
+    return True
+
+def maybe_profile():
+    """Start cProfile for a sampled request, or return None. Never raises."""
+    if not is_active() or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+    except Exception as e:
+        _profile_lock.release()
+        print(f"profiler enable error: {e}")
+        return None
+
+def finish_profile(prof):
+    global _stats
+    try:
+        prof.disable()
+        with _lock:
+            if _stats is None:
+                _stats = pstats.Stats(prof)
+            else:
+                _stats.add(prof)
+    except Exception as e:
+        print(f"profiler collect error: {e}")
+    finally:
+        _profile_lock.release()
+
+def _folded(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def _sample_stacks(seconds):
+    me = threading.get_ident()
+    interval = PROFILE_INTERVAL_MS / 1000
+    stacks = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != me:
+                stacks[_folded(frame)] += 1
+        samples += 1
+        time.sleep(interval)
+    _dump(stacks, samples)
+
+def _dump(stacks, samples):
+    global _stats
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        prefix = os.path.join(PROFILE_DIR, f"profile-{os.getpid()}-{stamp}")
+        with open(f"{prefix}.folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with _lock:
+            stats, _stats = _stats, None
+        if stats is not None:
+            stats.dump_stats(f"{prefix}.prof")
+        print(f"Profile written to {prefix}.* ({samples} stack samples, cProfile stats {'saved' if stats else 'not sampled'})")
+    except Exception as e:
+        print(f"profiler dump error: {e}")
+
+def install_signal_handler(signum=getattr(signal, "SIGUSR2", None)):
+    """Let ``kill -USR2 <pid>`` open a profiling window. Call from the main thread."""
+    if signum is None:
+        return
+    signal.signal(signum, lambda *_: start())
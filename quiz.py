@@ -1,8 +1,12 @@
 import re
 import requests
-from config import OPENROUTER_API_KEY, MODEL
+from config import OPENROUTER_API_KEY, MODEL, OPENROUTER_API_URL
+from metrics import LLM_SECONDS, PARSED_QUESTIONS
+from tracing import traced
 
-def generate_quiz_from_text(text, num_q=5):
+OPENROUTER_URL = f"{OPENROUTER_API_URL}/chat/completions"
+
+def build_quiz_request(text, num_q=5):
     prompt = (
         f"Generate {num_q} multiple-choice questions (A-D) from the following text.\n"
         f"Only create questions relevant to the main topics and lessons.\n\n"
@@ -20,17 +24,27 @@ def generate_quiz_from_text(text, num_q=5):
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.7,
     }
+    return headers, data
+
+def parse_completion(resp_json):
+    return parse_questions(resp_json["choices"][0]["message"]["content"])
+
+@traced()
+def generate_quiz_from_text(text, num_q=5):
+    headers, data = build_quiz_request(text, num_q)
     try:
-        r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=30)
-        r.raise_for_status()
-        text = r.json()["choices"][0]["message"]["content"]
-        return parse_questions(text)
+        with LLM_SECONDS.track(MODEL):
+            r = requests.post(OPENROUTER_URL, headers=headers, json=data, timeout=30)
+            r.raise_for_status()
+            resp_json = r.json()
+        return parse_completion(resp_json)
     except requests.Timeout:
         print("LLM request timed out")
     except Exception as e:
         print(f"LLM error: {e}")
     return []
 
+@traced()
 def parse_questions(raw):
     try:
         blocks = re.split(r"\n(?=\d+\)|Question)", raw)
@@ -49,6 +63,7 @@ def parse_questions(raw):
                     "options": {opt[0]: opt[1] for opt in opts},
                     "answer": answer
                 })
+        PARSED_QUESTIONS.observe(len(questions))
         return questions
     except Exception as e:
         print(f"parse_questions error: {e}")
@@ -0,0 +1,145 @@
+"""Write-behind persistence for the session store.
+
+Changes are coalesced per user in memory and a background thread appends
+them to a JSON-lines journal, one write and one fsync per batch. Once the
+journal holds SESSION_COMPACT_RECORDS records it is folded into a snapshot.
+
+The snapshot names the journal generation that follows it, so a crash in
+the middle of compaction replays either the old snapshot and the old
+journal, or the new snapshot and the new journal, never a mix.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+
+from config import SESSION_JOURNAL_DIR, SESSION_FLUSH_MS, SESSION_COMPACT_RECORDS
+
+SNAPSHOT_NAME = "sessions.snapshot.json"
+
+_lock = threading.Lock()
+_pending = {}
+_stopped = threading.Event()
+_thread = None
+_journal = None
+_generation = 0
+_records = 0
+_get_state = None
+
+def enabled():
+    return bool(SESSION_JOURNAL_DIR)
+
+def _journal_path(generation):
+    return os.path.join(SESSION_JOURNAL_DIR, f"sessions.{generation}.journal")
+
+def _fsync_dir():
+    fd = os.open(SESSION_JOURNAL_DIR, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def replay():
+    """Rebuild the session dict from the snapshot and its journal."""
+    global _generation
+    sessions = {}
+    snapshot_path = os.path.join(SESSION_JOURNAL_DIR, SNAPSHOT_NAME)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+        _generation = snapshot["generation"]
+        sessions = snapshot["sessions"]
+    path = _journal_path(_generation)
+    if os.path.exists(path):
+        good_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    user_id, data = json.loads(line)
+                except ValueError:
+                    break
+                good_bytes += len(line)
+                if data is None:
+                    sessions.pop(user_id, None)
+                else:
+                    sessions[user_id] = data
+        # Drop a torn final write from a crash so new records append cleanly
+        if good_bytes < os.path.getsize(path):
+            os.truncate(path, good_bytes)
+    return sessions
+
+def record(user_id, data):
+    """Queue a session change; data=None records a deletion. Never blocks on I/O."""
+    if _thread is None:
+        return
+    with _lock:
+        _pending[user_id] = dict(data) if data is not None else None
+
+def start(get_state):
+    """Start the flusher. get_state returns a copy of all sessions for compaction."""
+    global _thread, _journal, _get_state
+    if _thread is not None:
+        return
+    _get_state = get_state
+    _stopped.clear()
+    # Journals from other generations are leftovers of an interrupted compaction
+    for path in glob.glob(os.path.join(SESSION_JOURNAL_DIR, "sessions.*.journal")):
+        if path != _journal_path(_generation):
+            os.remove(path)
+    _journal = open(_journal_path(_generation), "a")
+    _thread = threading.Thread(target=_run, daemon=True, name="session-journal")
+    _thread.start()
+    atexit.register(stop)
+
+def stop():
+    """Flush whatever is pending and stop the flusher."""
+    global _thread
+    if _thread is None:
+        return
+    _stopped.set()
+    _thread.join(timeout=10)
+    _thread = None
+
+def flush():
+    global _pending, _records
+    with _lock:
+        batch, _pending = _pending, {}
+    if not batch:
+        return
+    _journal.write("".join(json.dumps([user_id, data]) + "\n" for user_id, data in batch.items()))
+    _journal.flush()
+    os.fsync(_journal.fileno())
+    _records += len(batch)
+    if _records >= SESSION_COMPACT_RECORDS:
+        compact()
+
+def compact():
+    global _journal, _generation, _records
+    old_path = _journal_path(_generation)
+    _generation += 1
+    _journal.close()
+    _journal = open(_journal_path(_generation), "a")
+    snapshot = {"generation": _generation, "sessions": _get_state()}
+    tmp_path = os.path.join(SESSION_JOURNAL_DIR, SNAPSHOT_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(SESSION_JOURNAL_DIR, SNAPSHOT_NAME))
+    _fsync_dir()
+    os.remove(old_path)
+    _records = 0
+
+def _run():
+    interval = SESSION_FLUSH_MS / 1000
+    while not _stopped.wait(interval):
+        try:
+            flush()
+        except Exception as e:
+            print(f"session journal flush error: {e}")
+    try:
+        flush()
+        _journal.close()
+    except Exception as e:
+        print(f"session journal close error: {e}")
@@ -1,10 +1,28 @@
+import os
+from config import SESSION_JOURNAL_DIR
+from metrics import Gauge
+import session_journal
+
 user_sessions = {}
+Gauge("quizbot_sessions", "Sessions held in the in-memory store.", lambda: len(user_sessions))
 
 def get_session(user_id):
     return user_sessions.get(user_id)
 
 def set_session(user_id, data):
     user_sessions[user_id] = data
+    session_journal.record(user_id, data)
 
 def clear_session(user_id):
     user_sessions.pop(user_id, None)
+    session_journal.record(user_id, None)
+
+def _copy_sessions():
+    return {user_id: dict(data) for user_id, data in list(user_sessions.items())}
+
+# Warm restart: reload sessions from the journal before serving anything
+if session_journal.enabled():
+    os.makedirs(SESSION_JOURNAL_DIR, exist_ok=True)
+    user_sessions.update(session_journal.replay())
+    print(f"Restored {len(user_sessions)} sessions from {SESSION_JOURNAL_DIR}")
+    session_journal.start(_copy_sessions)
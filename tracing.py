@@ -0,0 +1,115 @@
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import TRACE_SLOW_MS, TRACE_LOG
+import profiler
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_log_lock = threading.Lock()
+
+class Trace:
+    def __init__(self, name, attrs):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.spans = []
+
+    def to_record(self, duration):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": round(duration * 1000, 2),
+            "attrs": self.attrs,
+            "spans": self.spans,
+        }
+
+def _write_record(record):
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        if TRACE_LOG:
+            with open(TRACE_LOG, "a") as f:
+                f.write(line + "\n")
+        else:
+            print(f"slow trace: {line}")
+
+@contextmanager
+def start_trace(name, sample_profile=True, **attrs):
+    """Trace one webhook event; records it if it took longer than TRACE_SLOW_MS.
+
+    While a profiling window is open, a sample of traces also run under
+    cProfile. Pass sample_profile=False where cProfile would see other work
+    interleaved on the same thread (the asyncio engine).
+    """
+    trace = Trace(name, attrs)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    prof = None
+    error = None
+    try:
+        if sample_profile:
+            prof = profiler.maybe_profile()
+        yield trace
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        if prof is not None:
+            profiler.finish_profile(prof)
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        duration = time.perf_counter() - trace.start
+        if duration * 1000 >= TRACE_SLOW_MS:
+            record = trace.to_record(duration)
+            if error:
+                record["error"] = error
+            try:
+                _write_record(record)
+            except Exception as e:
+                print(f"trace write error: {e}")
+
+@contextmanager
+def span(name, **attrs):
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    record = {"name": name, "parent": _current_span.get(), "start_ms": round((start - trace.start) * 1000, 2)}
+    if attrs:
+        record["attrs"] = attrs
+    token = _current_span.set(len(trace.spans))
+    trace.spans.append(record)
+    try:
+        yield
+    except BaseException as e:
+        record["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+def traced(name=None):
+    """Decorator that wraps every call of a sync or async function in a span."""
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator